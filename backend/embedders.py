@@ -0,0 +1,73 @@
+import os
+from functools import cached_property
+
+import numpy as np
+import onnxruntime as ort
+from tokenizers import Tokenizer
+
+from chromadb import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils import embedding_functions
+
+# Split the cores between uvicorn workers (WEB_CONCURRENCY) so their ONNX
+# thread pools don't oversubscribe
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+ONNX_THREADS = int(
+    os.getenv("ONNX_THREADS", str(max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)))
+)
+
+
+def onnx_session_options():
+    so = ort.SessionOptions()
+    so.intra_op_num_threads = ONNX_THREADS
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    so.enable_cpu_mem_arena = True
+    so.log_severity_level = 3
+    return so
+
+
+class TunedMiniLM(embedding_functions.ONNXMiniLM_L6_V2):
+    """Chroma's default MiniLM embedder, with an ONNX session tuned for CPU throughput."""
+
+    @cached_property
+    def model(self):
+        return ort.InferenceSession(
+            os.path.join(self.DOWNLOAD_PATH, self.EXTRACTED_FOLDER_NAME, "model.onnx"),
+            sess_options=onnx_session_options(),
+            providers=["CPUExecutionProvider"],
+        )
+
+
+class BGESmallInt8(EmbeddingFunction):
+    """bge-small-en-v1.5 with dynamically quantized INT8 weights.
+
+    Build the model dir once (see start.bat): export to ONNX, quantize with
+    optimum-cli, and copy tokenizer.json next to model_quantized.onnx.
+    """
+
+    def __init__(self, model_dir: str):
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model_quantized.onnx"),
+            sess_options=onnx_session_options(),
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=512)
+        self.tokenizer.enable_padding()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        encoded = self.tokenizer.encode_batch(list(input))
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        feeds = {
+            "input_ids": input_ids,
+            "attention_mask": np.array([e.attention_mask for e in encoded], dtype=np.int64),
+        }
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        last_hidden = self.session.run(None, feeds)[0]
+        # BGE pools with the [CLS] token, then L2-normalizes
+        pooled = last_hidden[:, 0]
+        pooled = pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return [row.astype(np.float32) for row in pooled]
@@ -1,28 +1,178 @@
+import asyncio
+import errno
+import hashlib
+import json
 import os
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
 from typing import List, Optional
 
-import requests
+import httpx
+import numpy as np
+import orjson
+from cachetools import TTLCache
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel, Field
 
-import chromadb
-from chromadb.config import Settings
+try:
+    import fcntl
+except ImportError:  # Windows: lock with msvcrt instead of flock
+    fcntl = None
+    import msvcrt
+
+try:
+    import faiss
+except ImportError:  # optional: retrieval falls back to the NumPy scan
+    faiss = None
 
 # ---------- ChromaDB SETUP ----------
 
 CHROMA_PATH = os.getenv("CHROMA_PATH", "chroma_db")
-COLLECTION_NAME = os.getenv("CHROMA_COLLECTION", "code_snippets")
 
-client = chromadb.PersistentClient(path=CHROMA_PATH, settings=Settings(allow_reset=True))
-collection = client.get_or_create_collection(name=COLLECTION_NAME)
+# Directory holding an INT8 bge-small export (model_quantized.onnx + tokenizer.json);
+# unset keeps Chroma's default MiniLM. The models' vectors aren't comparable,
+# so each gets its own default collection.
+BGE_MODEL_DIR = os.getenv("BGE_MODEL_DIR")
+COLLECTION_NAME = os.getenv(
+    "CHROMA_COLLECTION", "code_snippets_bge" if BGE_MODEL_DIR else "code_snippets"
+)
 
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+
+# Set CHROMA_HOST to share one Chroma server (`chroma run`) across all workers
+# instead of each worker opening its own copy of the on-disk DB
+CHROMA_HOST = os.getenv("CHROMA_HOST")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8001"))
+
+# Small HNSW graph for a corpus of a few to ~1000 snippets, so seeding and
+# adds do less indexing work. Queries are served by DocIndex, not Chroma's
+# HNSW, so in practice these only affect writes (search_ef would only matter
+# for direct collection.query calls). hnsw:space stays at the default (l2),
+# which can't be changed on already-created collections.
+HNSW_METADATA = {
+    "hnsw:construction_ef": 64,
+    "hnsw:M": 8,
+    "hnsw:search_ef": 16,
+    "hnsw:batch_size": 1000,
+    "hnsw:sync_threshold": 10000,
+}
 
-def seed_chroma_if_empty():
-    existing = collection.count()
-    if existing > 0:
+# chromadb and the ONNX embedder take seconds to import/load, so both are built
+# on first retrieval rather than at import; /health never touches them
+_lazy_lock = threading.RLock()
+_embedder = None
+_collection = None
+
+
+def get_embedder():
+    global _embedder
+    if _embedder is None:
+        with _lazy_lock:
+            if _embedder is None:
+                try:  # imported as backend.main
+                    from . import embedders
+                except ImportError:  # run from backend/ as main
+                    import embedders
+
+                # One model shared by the collection, seeding and the query cache
+                if BGE_MODEL_DIR:
+                    _embedder = embedders.BGESmallInt8(BGE_MODEL_DIR)
+                else:
+                    _embedder = embedders.TunedMiniLM()
+    return _embedder
+
+
+def get_collection():
+    global _collection
+    if _collection is None:
+        with _lazy_lock:
+            if _collection is None:
+                import chromadb
+                from chromadb.config import Settings
+
+                if CHROMA_HOST:
+                    client = chromadb.HttpClient(
+                        host=CHROMA_HOST, port=CHROMA_PORT, settings=Settings(allow_reset=True)
+                    )
+                else:
+                    client = chromadb.PersistentClient(
+                        path=CHROMA_PATH, settings=Settings(allow_reset=True)
+                    )
+                collection = client.get_or_create_collection(
+                    name=COLLECTION_NAME,
+                    embedding_function=get_embedder(),
+                    metadata=HNSW_METADATA,
+                )
+                seed_chroma_if_empty(collection)
+                _collection = collection
+    return _collection
+
+
+def normalize_prompt(prompt: str) -> str:
+    # Both embedders are uncased and whitespace-insensitive, so this only merges true duplicates
+    return " ".join(prompt.lower().split())
+
+
+@lru_cache(maxsize=EMBED_CACHE_SIZE)
+def _embed_normalized(text: str):
+    return get_embedder()([text])[0]
+
+
+def embed_prompt(prompt: str):
+    return _embed_normalized(normalize_prompt(prompt))
+
+
+def _lock_file(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return
+    lock_file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError as e:
+            # LK_LOCK gives up with EDEADLOCK after ~10 s; keep waiting only on that
+            if e.errno != errno.EDEADLOCK:
+                raise
+
+
+def _unlock_file(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
         return
+    lock_file.seek(0)
+    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def seed_lock():
+    # Serialize seeding (and FAISS index writes) across uvicorn workers
+    # sharing the same CHROMA_PATH
+    os.makedirs(CHROMA_PATH, exist_ok=True)
+    with open(os.path.join(CHROMA_PATH, ".seed.lock"), "a+") as lock_file:
+        _lock_file(lock_file)
+        try:
+            yield
+        finally:
+            _unlock_file(lock_file)
+
+
+def seed_chroma_if_empty(collection):
+    with seed_lock():
+        # Re-check under the lock; another worker may have seeded already
+        if collection.count() > 0:
+            return
+        seed_chroma(collection)
 
+
+def seed_chroma(collection):
     docs = [
         # Simple Tailwind HTML template
         """Basic Tailwind HTML page:
@@ -274,25 +424,214 @@ def hello():
 
     ids = ["doc-html-tailwind", "doc-js-fetch", "doc-python-fastapi"]
 
-    collection.add(
+    # Embed the whole batch in one pass and write it with a single upsert;
+    # upsert also keeps a re-run after a partial seed idempotent
+    collection.upsert(
+        ids=ids,
         documents=docs,
         metadatas=metadatas,
-        ids=ids,
+        embeddings=get_embedder()(docs),
     )
 
 
-seed_chroma_if_empty()
+# ---------- IN-PROCESS RETRIEVAL ----------
+
+# Above this many docs, search a FAISS HNSW index (if faiss is installed)
+FAISS_MIN_DOCS = int(os.getenv("FAISS_MIN_DOCS", "1000"))
+
+# collection.count() is a SQLite query, or an HTTP round-trip with CHROMA_HOST,
+# so the in-process copy checks for changes at most this often
+INDEX_RECHECK_SECONDS = float(os.getenv("INDEX_RECHECK_SECONDS", "5"))
+# Per collection, since each embedder gets its own collection
+FAISS_INDEX_PATH = os.path.join(CHROMA_PATH, f"{COLLECTION_NAME}.faiss")
+FAISS_META_PATH = os.path.join(CHROMA_PATH, f"{COLLECTION_NAME}.faiss.json")
+
+
+def load_normalized_embeddings():
+    data = get_collection().get(include=["embeddings", "documents"])
+    matrix = np.asarray(data["embeddings"], dtype=np.float32)
+    if len(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, 1e-12)
+    return matrix, list(data["documents"]), list(data["ids"])
+
+
+def corpus_fingerprint(ids: List[str], docs: List[str]) -> str:
+    # Changes with the embedding model or any added/removed/edited document
+    model = f"BGESmallInt8:{os.path.abspath(BGE_MODEL_DIR)}" if BGE_MODEL_DIR else "TunedMiniLM"
+    digest = hashlib.blake2b(model.encode())
+    for doc_id, doc in sorted(zip(ids, docs)):
+        digest.update(orjson.dumps([doc_id, doc]))
+    return digest.hexdigest()
+
+
+def quantize_rows(matrix):
+    scales = np.max(np.abs(matrix), axis=1) / 127
+    scales = np.maximum(scales, 1e-12).astype(np.float32)
+    quantized = np.round(matrix / scales[:, None]).astype(np.int8)
+    return quantized, scales
+
+
+class Int8Scan:
+    """Brute-force top-K over int8 rows with per-row scales (4x smaller than float32)."""
+
+    def __init__(self, matrix, docs: List[str]):
+        self.docs = docs
+        if len(matrix):
+            self.quantized, self.scales = quantize_rows(matrix)
+        else:
+            self.quantized = np.empty((0, 0), dtype=np.int8)
+            self.scales = np.empty(0, dtype=np.float32)
+
+    def search(self, query, k: int) -> List[str]:
+        # The query's own scale is the same for every row, so it can't change the ranking
+        quantized_query, _ = quantize_rows(query[None, :])
+        # einsum casts in buffered chunks, so int32 accumulation needs no full-size copy
+        scores = np.einsum("ij,j->i", self.quantized, quantized_query[0], dtype=np.int32)
+        scores = scores * self.scales
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.docs[i] for i in top]
+
+
+class FaissHNSW:
+    """HNSW search over an index persisted under CHROMA_PATH.
+
+    Each worker loads its own in-memory copy; the file only saves rebuilding
+    the graph on every process start.
+    """
+
+    def __init__(self, index, docs: List[str]):
+        self.index = index
+        self.docs = docs
+
+    @classmethod
+    def load_or_build(cls) -> "FaissHNSW":
+        # Same lock as seeding, so workers never read a half-written index
+        with seed_lock():
+            if os.path.exists(FAISS_INDEX_PATH) and os.path.exists(FAISS_META_PATH):
+                data = get_collection().get(include=["documents"])
+                fingerprint = corpus_fingerprint(data["ids"], data["documents"])
+                with open(FAISS_META_PATH, encoding="utf-8") as f:
+                    meta = json.load(f)
+                if meta.get("fingerprint") == fingerprint:
+                    return cls(faiss.read_index(FAISS_INDEX_PATH), meta["docs"])
+
+            matrix, docs, ids = load_normalized_embeddings()
+            # Inner product on normalized vectors == cosine similarity
+            index = faiss.IndexHNSWFlat(matrix.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+            index.add(matrix)
+            faiss.write_index(index, FAISS_INDEX_PATH)
+            with open(FAISS_META_PATH, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": corpus_fingerprint(ids, docs), "docs": docs}, f)
+            return cls(index, docs)
+
+    def search(self, query, k: int) -> List[str]:
+        _, ids = self.index.search(query[None, :], k)
+        return [self.docs[i] for i in ids[0] if i >= 0]
+
+
+class DocIndex:
+    """In-process top-K retrieval so the hot path skips Chroma's query machinery.
+
+    Small corpora use an int8 brute-force scan; large ones use FAISS HNSW when
+    available. Reloaded from Chroma when the collection's count changes, checked
+    at most every INDEX_RECHECK_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = -1
+        self._checked_at = 0.0
+        self._searcher = Int8Scan(np.empty((0, 0), dtype=np.float32), [])
+
+    def refresh_if_stale(self):
+        now = time.monotonic()
+        if self._count >= 0 and now - self._checked_at < INDEX_RECHECK_SECONDS:
+            return
+        self._checked_at = now
+        count = get_collection().count()
+        if count == self._count:
+            return
+        with self._lock:
+            if count == self._count:
+                return
+            if faiss is not None and count >= FAISS_MIN_DOCS:
+                self._searcher = FaissHNSW.load_or_build()
+            else:
+                matrix, docs, _ = load_normalized_embeddings()
+                self._searcher = Int8Scan(matrix, docs)
+            self._count = count
+
+    def search(self, query_embedding, n_results: int) -> List[str]:
+        # Callers run refresh_if_stale() first (see retrieve_contexts)
+        searcher = self._searcher
+        if not searcher.docs:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(np.linalg.norm(query), 1e-12)
+        return searcher.search(query, min(n_results, len(searcher.docs)))
+
+
+doc_index = DocIndex()
+
 
 # ---------- OLLAMA + API SETUP ----------
 
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "tinyllama")  # adjust to your model
 
+SYSTEM_MESSAGE = (
+    "You are an expert code generator. "
+    "You receive a user request and some example code snippets as context. "
+    "Use the context as inspiration, but generate fresh, clean code."
+)
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+# Each retrieved snippet is clipped to this before going into the prompt
+CONTEXT_MAX_CHARS = int(os.getenv("CONTEXT_MAX_CHARS", "4096"))
+
+USER_PROMPT_TEMPLATE = """User request:
+{prompt}
+
+Code type: {code_type}
+
+Relevant snippets from the knowledge base:
+{contexts}
+
+Now generate the best possible code for the user. 
+Respond with ONLY code and minimal comments.
+"""
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+OLLAMA_RETRIES = int(os.getenv("OLLAMA_RETRIES", "3"))
+OLLAMA_BACKOFF = float(os.getenv("OLLAMA_BACKOFF", "0.2"))
+RETRY_STATUSES = {502, 503, 504}
+
+# Shared async client so Ollama calls reuse a bounded pool of keep-alive connections
+http_client = httpx.AsyncClient(
+    timeout=120,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+)
+
+# ---------- RESPONSE CACHE ----------
+
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_MAX_PROMPT = int(os.getenv("RESPONSE_CACHE_MAX_PROMPT", "4096"))
+
+# Only touched from the event loop, so no locking needed
+response_cache = TTLCache(maxsize=1024, ttl=RESPONSE_CACHE_TTL)
+
 
 class GenerateRequest(BaseModel):
-    prompt: str
-    code_type: Optional[str] = None
-    n_results: int = 3
+    # Bounded so one request can't blow up retrieval or Ollama's input size
+    prompt: str = Field(..., max_length=8192)
+    code_type: Optional[str] = Field(None, max_length=32)
+    n_results: int = Field(3, ge=1, le=20)
 
 
 class GenerateResponse(BaseModel):
@@ -300,15 +639,26 @@ class GenerateResponse(BaseModel):
     used_context: List[str]
 
 
-app = FastAPI(title="Chroma + Ollama Code Generator")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await http_client.aclose()
+
+
+app = FastAPI(title="Chroma + Ollama Code Generator", lifespan=lifespan)
 
-# Allow frontend on localhost
+# The frontend is served from /ui (same origin), so no cross-origin access is
+# needed by default. Comma-separated extra origins, e.g. http://localhost:5500
+# for a separate static server. "null" (pages opened from disk) is opt-in only:
+# sandboxed iframes and data: URLs on any site send it too.
+CORS_ORIGINS = os.getenv("CORS_ORIGINS", "")
+
+# Explicit origins/methods/headers and no credentials (no cookies are used)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # for local dev; tighten later
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=[o.strip() for o in CORS_ORIGINS.split(",") if o.strip()],
+    allow_methods=["GET", "POST"],
+    allow_headers=["content-type"],
 )
 
 
@@ -317,54 +667,184 @@ def health():
     return {"status": "ok"}
 
 
-@app.post("/api/generate", response_model=GenerateResponse)
-def generate_code(req: GenerateRequest):
-    # 1) Retrieve similar docs from Chroma
-    results = collection.query(
-        query_texts=[req.prompt],
-        n_results=req.n_results,
+async def retrieve_contexts(req: GenerateRequest) -> List[str]:
+    # Embedding (ONNX) and the throttled staleness check (collection.count(), local
+    # SQLite or the Chroma server) are independent blocking calls, so overlap
+    # them in worker threads
+    query_embedding, _ = await asyncio.gather(
+        asyncio.to_thread(embed_prompt, req.prompt),
+        asyncio.to_thread(doc_index.refresh_if_stale),
     )
+    return await asyncio.to_thread(doc_index.search, query_embedding, req.n_results)
 
-    contexts = results.get("documents", [[]])[0] if results.get("documents") else []
-    contexts_text = "\n\n---\n\n".join(contexts)
 
-    # 2) Build prompt for Ollama
-    system_message = (
-        "You are an expert code generator. "
-        "You receive a user request and some example code snippets as context. "
-        "Use the context as inspiration, but generate fresh, clean code."
+def build_messages(req: GenerateRequest, contexts: List[str]) -> List[dict]:
+    user_prompt = USER_PROMPT_TEMPLATE.format_map(
+        {
+            "prompt": req.prompt,
+            "code_type": req.code_type or "unspecified",
+            "contexts": CONTEXT_SEPARATOR.join(c[:CONTEXT_MAX_CHARS] for c in contexts),
+        }
     )
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": user_prompt},
+    ]
 
-    user_prompt = f"""User request:
-{req.prompt}
 
-Code type: {req.code_type or "unspecified"}
+def chat_payload(messages: List[dict], stream: bool) -> bytes:
+    # Encode straight to bytes with orjson instead of httpx's stdlib json path
+    return orjson.dumps({"model": OLLAMA_MODEL, "messages": messages, "stream": stream})
 
-Relevant snippets from the knowledge base:
-{contexts_text}
 
-Now generate the best possible code for the user. 
-Respond with ONLY code and minimal comments.
-"""
+async def send_chat(payload: bytes, stream: bool = False) -> httpx.Response:
+    # Retry resets and 502/503/504 with exponential backoff; timeouts already
+    # waited the full 120 s, so those are not retried
+    for attempt in range(OLLAMA_RETRIES + 1):
+        last_attempt = attempt == OLLAMA_RETRIES
+        request = http_client.build_request(
+            "POST", f"{OLLAMA_URL}/api/chat", content=payload, headers=JSON_HEADERS
+        )
+        try:
+            resp = await http_client.send(request, stream=stream)
+        except httpx.TimeoutException:
+            raise
+        except httpx.TransportError:
+            if last_attempt:
+                raise
+        else:
+            if resp.status_code not in RETRY_STATUSES or last_attempt:
+                return resp
+            await resp.aclose()
+        await asyncio.sleep(OLLAMA_BACKOFF * 2**attempt)
+
+
+def response_cache_key(req: GenerateRequest) -> Optional[str]:
+    # Skip caching huge prompts; they're unlikely to repeat and bloat the cache
+    if len(req.prompt) > RESPONSE_CACHE_MAX_PROMPT:
+        return None
+    raw = f"{req.prompt}|{req.code_type}|{req.n_results}"
+    return hashlib.blake2b(raw.encode()).hexdigest()
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+@app.post("/api/generate", response_model=GenerateResponse)
+async def generate_code(req: GenerateRequest):
+    cache_key = response_cache_key(req)
+    if cache_key is not None:
+        # Single lookup: a TTLCache entry can expire between `in` and `[]`
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    # 1) Retrieve similar docs from Chroma
+    contexts = await retrieve_contexts(req)
+
+    # 2) Build prompt for Ollama
+    messages = build_messages(req, contexts)
 
     # 3) Call Ollama chat API
     try:
-        resp = requests.post(
-            f"{OLLAMA_URL}/api/chat",
-            json={
-                "model": OLLAMA_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_prompt},
-                ],
-                "stream": False,
-            },
-            timeout=120,
-        )
+        resp = await send_chat(chat_payload(messages, stream=False))
         resp.raise_for_status()
-        data = resp.json()
+        data = orjson.loads(resp.content)
         content = data.get("message", {}).get("content", "")
     except Exception as e:
-        content = f"Error calling Ollama: {e}"
+        # Errors are returned but never cached
+        return GenerateResponse(output=f"Error calling Ollama: {e}", used_context=contexts)
+
+    response = GenerateResponse(output=content, used_context=contexts)
+    if cache_key is not None:
+        response_cache[cache_key] = response
+    return response
+
+
+@app.post("/api/generate/stream")
+async def generate_code_stream(req: GenerateRequest):
+    # Shares response_cache with /api/generate; a hit replays as a single token event
+    cache_key = response_cache_key(req)
+    cached = response_cache.get(cache_key) if cache_key is not None else None
+    if cached is not None:
+
+        async def cached_stream():
+            yield sse_event("context", {"used_context": cached.used_context})
+            yield sse_event("token", {"content": cached.output})
+            yield sse_event("done", {})
+
+        return StreamingResponse(cached_stream(), media_type="text/event-stream")
+
+    contexts = await retrieve_contexts(req)
+    messages = build_messages(req, contexts)
+
+    async def event_stream():
+        # First event carries the retrieval info, then tokens as Ollama emits them
+        yield sse_event("context", {"used_context": contexts})
+        parts = []
+        completed = False
+        try:
+            resp = await send_chat(chat_payload(messages, stream=True), stream=True)
+            try:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = orjson.loads(line)
+                    content = chunk.get("message", {}).get("content", "")
+                    if content:
+                        parts.append(content)
+                        yield sse_event("token", {"content": content})
+                    if chunk.get("done"):
+                        completed = True
+                        break
+            finally:
+                await resp.aclose()
+        except Exception as e:
+            yield sse_event("error", {"message": f"Error calling Ollama: {e}"})
+
+        # Only cache generations Ollama finished; errors and cut-off streams are skipped
+        if completed and cache_key is not None:
+            response_cache[cache_key] = GenerateResponse(
+                output="".join(parts), used_context=contexts
+            )
+        yield sse_event("done", {})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+FRONTEND_DIR = os.getenv(
+    "FRONTEND_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "frontend"),
+)
 
-    return GenerateResponse(output=content, used_context=contexts)
+# Mounted after the API routes so /api and /health take precedence
+if os.path.isdir(FRONTEND_DIR):
+    app.mount("/ui", StaticFiles(directory=FRONTEND_DIR, html=True), name="ui")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # The embedded PersistentClient isn't safe across processes, so multiple
+    # workers need the shared Chroma server (CHROMA_HOST): one worker per core
+    # then, a single worker (ONNX using every core) otherwise. Workers inherit
+    # WEB_CONCURRENCY (also uvicorn's own --workers default), so
+    # embedders.ONNX_THREADS splits the cores between them.
+    default_workers = (os.cpu_count() or 1) if CHROMA_HOST else 1
+    workers = int(os.environ.setdefault("WEB_CONCURRENCY", str(default_workers)))
+    if workers > 1 and not CHROMA_HOST:
+        sys.exit("WEB_CONCURRENCY > 1 requires CHROMA_HOST (a shared `chroma run` server)")
+
+    # uvloop + httptools come with uvicorn[standard]; uvloop doesn't support Windows
+    uvicorn.run(
+        # Extra workers must re-import the app by name; a single process serves
+        # this module's app directly instead of importing main a second time
+        "main:app" if workers > 1 else app,
+        host="127.0.0.1",
+        port=int(os.getenv("PORT", "8000")),
+        loop="auto" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=workers,
+    )
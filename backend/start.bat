@@ -1,5 +1,32 @@
+REM The frontend is served by the backend: open http://localhost:8000/ui/
+REM To call the API from another origin, allow it explicitly, e.g.
+REM set CORS_ORIGINS=http://localhost:5500
+REM Opening the pages from disk sends Origin "null"; "set CORS_ORIGINS=null" allows
+REM that, but also any site using a sandboxed iframe, so keep it for local use only
 python -m venv .venv
 pip install -r requirements.txt
 uvicorn main:app --reload
 
 python -m uvicorn main:app --reload --port 8000
+
+REM Multiple workers: run one shared Chroma server and point the backend at it
+chroma run --path ./chroma_db --port 8001
+set CHROMA_HOST=localhost
+REM uvicorn takes its worker count from WEB_CONCURRENCY, and the ONNX embedder
+REM uses it to split the cores between workers
+set WEB_CONCURRENCY=4
+python -m uvicorn main:app --port 8000
+
+REM Optional: INT8 bge-small embedder (built once, then point BGE_MODEL_DIR at it)
+optimum-cli export onnx --model BAAI/bge-small-en-v1.5 bge-onnx
+optimum-cli onnxruntime quantize --onnx_model bge-onnx --avx512_vnni -o bge-int8
+copy bge-onnx\tokenizer.json bge-int8\
+set BGE_MODEL_DIR=bge-int8
+
+REM One worker per core with the httptools parser (same as "python main.py" with
+REM CHROMA_HOST set). Needs the shared Chroma server above: the embedded client
+REM isn't safe across worker processes. uvloop is Linux/macOS only; there, also
+REM pass --loop uvloop
+set CHROMA_HOST=localhost
+set WEB_CONCURRENCY=%NUMBER_OF_PROCESSORS%
+python -m uvicorn main:app --http httptools --port 8000